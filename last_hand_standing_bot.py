@@ -1,8 +1,16 @@
+import asyncio
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import random
+from collections import namedtuple
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 
 from telegram import (
     Update,
@@ -10,23 +18,44 @@ from telegram import (
     InlineKeyboardMarkup,
 )
 from telegram.ext import (
+    AIORateLimiter,
     ApplicationBuilder,
     CommandHandler,
     ContextTypes,
     CallbackQueryHandler,
 )
+from telegram.request import HTTPXRequest
+
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
 
 # =========================
 # Logging
 # =========================
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
 logger = logging.getLogger(__name__)
 
 
+def setup_logging():
+    """Send all logging through a queue drained by a listener thread.
+
+    Handlers on the event loop only enqueue records; the listener formats
+    and writes them, so a slow stderr never stalls update processing.
+    """
+    log_queue: queue.Queue = queue.Queue(-1)
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+
 # =========================
 # Card Catalog
 # =========================
@@ -37,7 +66,7 @@ logger = logging.getLogger(__name__)
 # - target: "self", "other", "any", "multi_other", "multi_any", "none"
 # - description: rules text (engine is a simplified subset)
 
-CARD_CATALOG: Dict[str, Dict] = {
+_CARD_DATA: Dict[str, Dict] = {
     # ===== CURSE (generic, used by many effects) =====
     "CURSE": {
         "name": "Curse",
@@ -1502,204 +1531,6 @@ CARD_CATALOG: Dict[str, Dict] = {
     },
 }
 
-# Default starter deck (10 cards)
-STARTER_DECK_DEFAULT = [
-    "BASE_VOTE",
-    "BASE_VOTE",
-    "BASE_VOTE",
-    "BASE_VOTE",
-    "BLOCK_1",
-    "ASSIST_ALLY",
-    "BLOCK_ALLY",
-    "PEEK",
-    "SURVIVE",
-    "WEAKEN",
-]
-
-# Build upgrade map based on *_UG cards
-UPGRADE_MAP: Dict[str, str] = {}
-for cid in CARD_CATALOG.keys():
-    if cid.endswith("_UG"):
-        base = cid[:-3]
-        if base in CARD_CATALOG:
-            UPGRADE_MAP[base] = cid
-
-# Special-case typo'd id if needed
-if "BLOCK_2" in CARD_CATALOG and "BLOCK_2z_UG" in CARD_CATALOG:
-    UPGRADE_MAP["BLOCK_2"] = "BLOCK_2z_UG"
-
-
-# =========================
-# Core Data Structures
-# =========================
-
-@dataclass
-class PlayerState:
-    user_id: int
-    username: str
-    alive: bool = True
-    deck: List[str] = field(default_factory=list)
-    discard: List[str] = field(default_factory=list)
-    hand: List[str] = field(default_factory=list)
-    energy_max: int = 3
-    energy: int = 3
-    blocks: int = 0
-    votes_cast_this_round: int = 0
-    votes_received_this_round: int = 0
-    # Buffs for next round etc.
-    next_round_extra_cards: int = 0
-    next_round_energy_bonus: int = 0
-    # For retain-related effects
-    retained_last_round: Dict[str, bool] = field(default_factory=dict)
-    # Phase flags
-    turn_done: bool = False
-    draft_done: bool = False
-    camp_done: bool = False
-    # Tracking for more advanced effects
-    cards_played_this_round: List[str] = field(default_factory=list)
-    cards_discarded_this_round: List[str] = field(default_factory=list)
-
-
-@dataclass
-class Action:
-    source_id: int
-    card_id: str
-    target_id: Optional[int] = None
-    x_value: int = 0  # for X-cost cards
-
-
-@dataclass
-class GameState:
-    chat_id: int
-    host_id: int
-    round_number: int = 0
-    joining_open: bool = True
-    phase: str = "lobby"  # lobby, playing, drafting, camp, finished
-    players: Dict[int, PlayerState] = field(default_factory=dict)
-    actions: List[Action] = field(default_factory=list)
-    reward_offers: Dict[int, List[str]] = field(default_factory=dict)
-
-
-# chat_id -> GameState
-GAMES: Dict[int, GameState] = {}
-
-# player_id -> chat_id (so DMs know which game you belong to)
-PLAYER_TO_GAME: Dict[int, int] = {}
-
-
-# =========================
-# Helper / Utility
-# =========================
-
-def get_game(chat_id: int) -> Optional[GameState]:
-    return GAMES.get(chat_id)
-
-
-def get_game_for_player(user_id: int) -> Optional[GameState]:
-    chat_id = PLAYER_TO_GAME.get(user_id)
-    if chat_id is None:
-        return None
-    return GAMES.get(chat_id)
-
-
-def require_game(func):
-    """Decorator to ensure a game exists for the chat (group commands)."""
-    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        chat = update.effective_chat
-        if not chat:
-            return
-        if chat.type == "private":
-            await update.effective_message.reply_text("Use this command in the group game chat.")
-            return
-        game = get_game(chat.id)
-        if not game:
-            await update.effective_message.reply_text("No game in this chat. Use /newgame to start.")
-            return
-        return await func(update, context, game)
-    return wrapper
-
-
-def card_name(card_id: str) -> str:
-    return CARD_CATALOG.get(card_id, {}).get("name", card_id)
-
-
-def card_cost(card_id: str):
-    return CARD_CATALOG.get(card_id, {}).get("cost", 1)
-
-
-def card_desc(card_id: str) -> str:
-    return CARD_CATALOG.get(card_id, {}).get("description", "")
-
-
-def card_has_retain(card_id: str) -> bool:
-    desc = CARD_CATALOG.get(card_id, {}).get("description", "").lower()
-    return "retain in hand if not played" in desc
-
-
-def is_vote_card(card_id: str) -> bool:
-    """Very simple heuristic: card whose description starts with/contains 'Cast' and 'vote'."""
-    desc = card_desc(card_id).lower()
-    return "cast" in desc and "vote" in desc
-
-
-def draw_one(player: PlayerState):
-    """Draw a single card; reshuffle discard if deck is empty."""
-    if not player.deck and player.discard:
-        tmp = list(player.discard)
-        player.discard.clear()
-        random.shuffle(tmp)
-        player.deck.extend(tmp)
-    if player.deck:
-        card = player.deck.pop()
-        player.hand.append(card)
-        return card
-    return None
-
-
-def draw_cards(player: PlayerState, n: int):
-    drawn = []
-    for _ in range(max(0, n)):
-        c = draw_one(player)
-        if c is None:
-            break
-        drawn.append(c)
-    return drawn
-
-
-def discard_random(player: PlayerState, count: int = 1):
-    """Discard random cards from hand."""
-    for _ in range(max(0, count)):
-        if not player.hand:
-            return
-        idx = random.randrange(len(player.hand))
-        cid = player.hand.pop(idx)
-        player.discard.append(cid)
-        player.cards_discarded_this_round.append(cid)
-
-
-def format_hand(player: PlayerState) -> str:
-    lines = [f"Energy: {player.energy}/{player.energy_max}", "Your hand:"]
-    if not player.hand:
-        lines.append(" - (empty)")
-    else:
-        for idx, cid in enumerate(player.hand):
-            cost = card_cost(cid)
-            cost_str = "X" if cost == "X" else ("-" if cost is None else str(cost))
-            lines.append(f"{idx+1}. {card_name(cid)} (cost {cost_str})")
-    return "\n".join(lines)
-
-
-def list_alive_players(game: GameState) -> List[PlayerState]:
-    return [p for p in game.players.values() if p.alive]
-
-
-def list_common_uncommon_ids() -> List[str]:
-    ids = []
-    for cid, data in CARD_CATALOG.items():
-        if data.get("rarity") in ("common", "uncommon"):
-            ids.append(cid)
-    return ids
-
 
 # =========================
 # Simple vote/block maps used in /resolve
@@ -1789,174 +1620,650 @@ BLOCK_CARDS_SIMPLE: Dict[str, int] = {
 }
 
 
-# =========================
-# Commands: Group
-# =========================
-
-async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    text = (
-        "🎮 *Last Hand Standing – Commands*\n\n"
-        "*Group commands:*\n"
-        "/newgame – Start a new game in this group\n"
-        "/join – Join the current game\n"
-        "/startgame – Initialize decks (host only)\n"
-        "/nextround – Begin the next round (host only)\n"
-        "/resolve – Resolve all played cards and eliminate (host only)\n"
-        "/players – List all players (alive & eliminated)\n"
-        "/status – Show round, phase, and player status\n"
-        "/readycheck – Show who hasn’t finished actions (host only)\n"
-        "/camp – Camp phase: upgrade/remove a card (host only)\n"
-        "/reward – Extra draft of 3 cards (host only; manual)\n"
-        "/endgame – End the current game early (host only)\n\n"
-        "*DM commands:*\n"
-        "/start – Info & help (in DM)\n"
-        "/deck – View your deck\n"
-        "/remove N – Remove the Nth card from your deck\n"
-        "/upgrade N – Upgrade the Nth card in your deck\n"
-    )
-    await update.effective_message.reply_text(text, parse_mode="Markdown")
-
-
-async def newgame(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat = update.effective_chat
-    user = update.effective_user
-    if chat.type == "private":
-        await update.effective_message.reply_text("Please use /newgame in a GROUP chat.")
-        return
+CardDef = namedtuple(
+    "CardDef",
+    "name rarity cost target description has_retain vote_amount block_amount",
+)
 
-    GAMES[chat.id] = GameState(chat_id=chat.id, host_id=user.id)
-    await update.effective_message.reply_text(
-        f"🎮 New Last Hand Standing game created by {user.mention_html()}!\n"
-        "Players can now /join.\n"
-        "When ready, host can /startgame and then /nextround.",
-        parse_mode="HTML",
+# Catalog order: each rarity occupies one contiguous run of card indices
+RARITY_ORDER: Tuple[str, ...] = ("starter", "common", "uncommon", "curse")
+
+# Immutable per-card records built once at import; every lookup in the
+# engine/UI goes through this instead of re-reading the raw dicts. The
+# read-only proxy keeps handlers from mutating the shared catalog.
+CARD_CATALOG: Mapping[str, CardDef] = MappingProxyType({
+    cid: CardDef(
+        name=d["name"],
+        rarity=d["rarity"],
+        cost=d["cost"],
+        target=d["target"],
+        description=d["description"],
+        has_retain="retain in hand if not played" in d["description"].lower(),
+        vote_amount=VOTE_CARDS_SIMPLE.get(cid, 0),
+        block_amount=BLOCK_CARDS_SIMPLE.get(cid, 0),
     )
+    for cid, d in sorted(_CARD_DATA.items(), key=lambda item: RARITY_ORDER.index(item[1]["rarity"]))
+})
 
+# Dense small-int card indices. Player piles (deck/discard/hand) store these
+# in bytearrays; CARD_IDS / CARD_BY_INDEX map an index back to its id / card.
+CARD_IDS: Tuple[str, ...] = tuple(CARD_CATALOG)
+CARD_INDEX: Mapping[str, int] = MappingProxyType({cid: i for i, cid in enumerate(CARD_IDS)})
+CARD_BY_INDEX: Tuple[CardDef, ...] = tuple(CARD_CATALOG.values())
+assert len(CARD_IDS) <= 256, "card indices must fit in a byte"
 
-@require_game
-async def join(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
-    user = update.effective_user
-    if not game.joining_open:
-        await update.effective_message.reply_text("Joining is closed for this game.")
-        return
-    if user.id in game.players:
-        await update.effective_message.reply_text("You are already in the game.")
-        return
+# Cost flag bits; the energy byte of an X or unplayable card is 0
+COST_X = 1
+COST_UNPLAYABLE = 2
 
-    username = user.full_name or user.username or str(user.id)
-    ps = PlayerState(user_id=user.id, username=username)
-    game.players[user.id] = ps
-    PLAYER_TO_GAME[user.id] = game.chat_id
 
-    await update.effective_message.reply_text(
-        f"{username} has joined the game! ({len(game.players)} players total)"
-    )
+def _parse_cost(cost) -> Tuple[int, int]:
+    """(energy, flags) for a catalog cost."""
+    if cost is None:
+        return 0, COST_UNPLAYABLE
+    if cost == "X":
+        return 0, COST_X
+    try:
+        return int(cost), 0
+    except (TypeError, ValueError):
+        return 1, 0
 
 
-@require_game
-async def startgame(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
-    user = update.effective_user
-    if user.id != game.host_id:
-        await update.effective_message.reply_text("Only the host can start the game.")
-        return
-    if len(game.players) < 2:
-        await update.effective_message.reply_text("Need at least 2 players to start.")
-        return
+# Parsed cost per card index, so play checks are plain int compares
+_PARSED_COSTS = [_parse_cost(card.cost) for card in CARD_BY_INDEX]
+CARD_COST_ENERGY = bytes(energy for energy, _ in _PARSED_COSTS)
+CARD_COST_FLAGS = bytes(flags for _, flags in _PARSED_COSTS)
+del _PARSED_COSTS
 
-    game.joining_open = False
-    game.round_number = 0
-    game.phase = "lobby"
+# Facts apply_immediate_effect reads from a card's description text
+EffectText = namedtuple("EffectText", "draw fill_to adds_curse next_round_cards gains_3e")
 
-    for p in game.players.values():
-        p.deck = STARTER_DECK_DEFAULT.copy()
-        random.shuffle(p.deck)
-        p.discard = []
-        p.hand = []
-        p.energy_max = 3
-        p.energy = 3
-        p.blocks = 0
-        p.turn_done = False
-        p.draft_done = False
-        p.camp_done = False
-        p.next_round_extra_cards = 0
-        p.next_round_energy_bonus = 0
-        p.cards_played_this_round.clear()
-        p.cards_discarded_this_round.clear()
 
-    await update.effective_message.reply_text(
-        "🃏 Game started! All players have the starter 10-card deck.\n"
-        "Host can now use /nextround to begin Round 1."
+def _parse_effect_text(description: str) -> EffectText:
+    desc = description.lower()
+    draw = 0
+    for n, phrase in ((4, "draw 4 cards"), (3, "draw 3 cards"), (2, "draw 2 cards"), (1, "draw 1 card")):
+        if phrase in desc:
+            draw = n
+            break
+    fill_to = 0
+    for n in (5, 6):
+        if f"draw cards until you have {n}" in desc:
+            fill_to = n
+            break
+    return EffectText(
+        draw=draw,
+        fill_to=fill_to,
+        adds_curse="add a curse card to your draw pile" in desc,
+        next_round_cards=2 if "gain +2 card next round" in desc else 1,
+        gains_3e="gain 3e" in desc,
     )
 
 
-@require_game
-async def players_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
-    alive = [p.username for p in game.players.values() if p.alive]
-    dead = [p.username for p in game.players.values() if not p.alive]
+# Parsed once per card so playing a card doesn't rescan its description
+CARD_EFFECT_TEXT: Tuple[EffectText, ...] = tuple(
+    _parse_effect_text(card.description) for card in CARD_BY_INDEX
+)
 
-    if not game.players:
-        await update.effective_message.reply_text("No players have joined yet.")
-        return
+# "Name (cost N)" per card index, as shown in hand listings and buttons
+CARD_HAND_LABELS: Tuple[str, ...] = tuple(
+    f"{card.name} (cost {'X' if card.cost == 'X' else ('-' if card.cost is None else card.cost)})"
+    for card in CARD_BY_INDEX
+)
 
-    lines = ["👥 Players in this game", ""]
-    lines.append("Alive:")
-    if alive:
-        lines.extend(f" - {name}" for name in alive)
-    else:
-        lines.append(" - (none)")
+# Card indices that stay in hand between rounds unless played
+RETAIN_INDICES: frozenset = frozenset(ci for ci, card in enumerate(CARD_BY_INDEX) if card.has_retain)
+
+# Index of the generic curse effects shuffle into the draw pile
+CURSE_INDEX: int = CARD_INDEX["CURSE"]
+
+# Starter helpers whose votes/blocks land on the chosen ally rather than via the simple maps:
+# card index -> (votes, blocks) added to the target
+ALLY_HELPER_BONUS: Mapping[int, Tuple[int, int]] = MappingProxyType({
+    CARD_INDEX["ASSIST_ALLY"]: (1, 0),
+    CARD_INDEX["ASSIST_ALLY_UG"]: (2, 0),
+    CARD_INDEX["BLOCK_ALLY"]: (0, 1),
+    CARD_INDEX["BLOCK_ALLY_UG"]: (0, 2),
+})
+
+# What playing a card adds to the round tallies, per card index:
+# (votes on target, blocks on self, ally votes on target, ally blocks on target)
+CARD_TALLY: Tuple[Tuple[int, int, int, int], ...] = tuple(
+    (card.vote_amount, card.block_amount) + ALLY_HELPER_BONUS.get(ci, (0, 0))
+    for ci, card in enumerate(CARD_BY_INDEX)
+)
 
-    lines.append("")
-    lines.append("Eliminated:")
-    if dead:
-        lines.extend(f" - {name}" for name in dead)
-    else:
-        lines.append(" - (none)")
 
-    await update.effective_message.reply_text("\n".join(lines))
+def _rarity_ranges() -> Dict[str, range]:
+    ranges = {}
+    start = 0
+    for rarity in RARITY_ORDER:
+        count = sum(1 for card in CARD_BY_INDEX if card.rarity == rarity)
+        if count:
+            ranges[rarity] = range(start, start + count)
+        start += count
+    return ranges
 
 
-@require_game
-async def nextround(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
-    """
-    Start a new round:
-    - Discard old non-retain cards
-    - Keep retain cards in hand
-    - Reset energy/blocks
-    - Draw 5 + bonus new cards (no hand size cap)
-    - DM hands
-    """
-    user = update.effective_user
-    if user.id != game.host_id:
-        await update.effective_message.reply_text("Only the host can start a new round.")
-        return
+# Index range per rarity; sorting the catalog keeps each one contiguous
+RARITY_RANGES: Mapping[str, range] = MappingProxyType(_rarity_ranges())
 
-    alive = list_alive_players(game)
-    if len(alive) < 2:
-        await update.effective_message.reply_text("Not enough players alive to continue.")
-        return
+# Card ids per rarity (starter, common, uncommon, curse), in catalog order
+CARDS_BY_RARITY: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    rarity: CARD_IDS[r.start:r.stop] for rarity, r in RARITY_RANGES.items()
+})
 
-    game.round_number += 1
-    game.phase = "playing"
-    game.actions = []
+# Draft/reward pool: commons then uncommons
+COMMON_UNCOMMON_IDS: Tuple[str, ...] = CARDS_BY_RARITY["common"] + CARDS_BY_RARITY["uncommon"]
 
-    await update.effective_message.reply_text(
-        f"🔄 Starting Round {game.round_number}! Discarding non-retain cards and dealing 5 new cards..."
-    )
 
-    for p in alive:
-        # Mark which retain cards stayed from last round
-        new_retained = {}
-        for cid in p.hand:
-            if card_has_retain(cid):
-                new_retained[cid] = True
-
-        # Discard all non-retain cards in hand
-        new_hand = []
-        for cid in p.hand:
-            if card_has_retain(cid):
-                new_hand.append(cid)  # stays in hand
-            else:
-                p.discard.append(cid)
+# Default starter deck (10 cards)
+STARTER_DECK_DEFAULT = bytes(CARD_INDEX[cid] for cid in (
+    "BASE_VOTE",
+    "BASE_VOTE",
+    "BASE_VOTE",
+    "BASE_VOTE",
+    "BLOCK_1",
+    "ASSIST_ALLY",
+    "BLOCK_ALLY",
+    "PEEK",
+    "SURVIVE",
+    "WEAKEN",
+))
+
+# Build upgrade map based on *_UG cards; BLOCK_2's upgrade carries a typo'd id
+UPGRADE_MAP: Mapping[str, str] = MappingProxyType({
+    **{cid[:-3]: cid for cid in CARD_IDS if cid.endswith("_UG") and cid[:-3] in CARD_CATALOG},
+    "BLOCK_2": "BLOCK_2z_UG",
+})
+assert UPGRADE_MAP.keys() <= CARD_CATALOG.keys() and set(UPGRADE_MAP.values()) <= CARD_CATALOG.keys()
+
+
+# =========================
+# Core Data Structures
+# =========================
+
+@dataclass(slots=True)
+class PlayerState:
+    user_id: int
+    username: str
+    alive: bool = True
+    # Piles hold CARD_INDEX values
+    deck: bytearray = field(default_factory=bytearray)
+    discard: bytearray = field(default_factory=bytearray)
+    hand: bytearray = field(default_factory=bytearray)
+    energy_max: int = 3
+    energy: int = 3
+    blocks: int = 0
+    votes_cast_this_round: int = 0
+    votes_received_this_round: int = 0
+    # Tallied as cards are played
+    blocks_incoming: int = 0
+    # Buffs for next round etc.
+    next_round_extra_cards: int = 0
+    next_round_energy_bonus: int = 0
+    # For retain-related effects: bit CARD_INDEX[cid] set if cid was retained
+    retained_last_round: int = 0
+    # Phase flags
+    turn_done: bool = False
+    draft_done: bool = False
+    camp_done: bool = False
+    # (CARD_INDEX, x_value) of a paid-for card waiting for its target
+    pending_play: Optional[Tuple[int, int]] = None
+    # Tracking for more advanced effects
+    cards_played_this_round: bytearray = field(default_factory=bytearray)
+    cards_discarded_this_round: bytearray = field(default_factory=bytearray)
+    # Hand DM as last sent/edited; cleared when that message shows another view
+    hand_msg_id: int = 0
+    last_hand_rendered: str = ""
+
+
+@dataclass(slots=True)
+class Action:
+    source_id: int
+    card_index: int  # CARD_INDEX of the played card
+    target_id: Optional[int] = None
+    x_value: int = 0  # for X-cost cards
+
+
+@dataclass(slots=True)
+class GameState:
+    chat_id: int
+    host_id: int
+    # Never-reused id assigned by the registry; compact callbacks carry it instead of the chat id
+    game_id: int = 0
+    round_number: int = 0
+    # Round whose votes /resolve has already applied; -1 before the first
+    resolved_round: int = -1
+    joining_open: bool = True
+    phase: str = "lobby"  # lobby, playing, drafting, camp, finished
+    players: Dict[int, PlayerState] = field(default_factory=dict)
+    # Subset of players still alive, kept in join order
+    alive_players: Dict[int, PlayerState] = field(default_factory=dict)
+    # User ids in join order; compact callbacks address players by seat
+    seats: List[int] = field(default_factory=list)
+    actions: List[Action] = field(default_factory=list)
+    reward_offers: Dict[int, List[str]] = field(default_factory=dict)
+    # (round_number, source user_id) -> target picker; cleared on new round / elimination
+    keyboard_cache: Dict[Tuple[int, int], InlineKeyboardMarkup] = field(default_factory=dict)
+    # Per-game RNG so shuffles and draft offers can be replayed from a seed
+    rng: random.Random = field(default_factory=random.Random)
+
+
+@dataclass
+class GameRegistry:
+    """All running games, indexed by chat and by player.
+
+    Handlers hold lock(chat_id) while touching a game, so updates for one
+    chat are applied in order while other chats proceed independently.
+    """
+    # chat_id -> GameState
+    games: Dict[int, GameState] = field(default_factory=dict)
+    # player_id -> chat_id (so DMs know which game you belong to)
+    player_to_game: Dict[int, int] = field(default_factory=dict)
+    # game_id -> chat_id, so a compact button finds its game from the tap alone
+    chat_by_game_id: Dict[int, int] = field(default_factory=dict)
+    next_game_id: int = 1
+    _locks: Dict[int, asyncio.Lock] = field(default_factory=dict)
+    # chat_id -> handlers holding or waiting on that chat's lock
+    _lock_users: Dict[int, int] = field(default_factory=dict)
+
+    @asynccontextmanager
+    async def lock(self, chat_id: int):
+        """Hold the chat's lock.
+
+        Everyone holding or waiting shares the same lock; it is only dropped
+        once nobody uses it and the chat has no game left.
+        """
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = self._locks[chat_id] = asyncio.Lock()
+        self._lock_users[chat_id] = self._lock_users.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            users = self._lock_users[chat_id] - 1
+            if users:
+                self._lock_users[chat_id] = users
+            else:
+                del self._lock_users[chat_id]
+                if chat_id not in self.games:
+                    del self._locks[chat_id]
+
+    def get_game(self, chat_id: int) -> Optional[GameState]:
+        return self.games.get(chat_id)
+
+    def add_game(self, game: GameState):
+        """Install game for its chat (replacing any old one) under a fresh game_id."""
+        self.remove_game(game.chat_id)
+        game.game_id = self.next_game_id
+        self.next_game_id += 1
+        self.games[game.chat_id] = game
+        self.chat_by_game_id[game.game_id] = game.chat_id
+
+    def remove_game(self, chat_id: int):
+        game = self.games.pop(chat_id, None)
+        if game:
+            self.chat_by_game_id.pop(game.game_id, None)
+
+
+REGISTRY = GameRegistry()
+
+
+# =========================
+# Helper / Utility
+# =========================
+
+def require_game(func):
+    """Decorator to ensure a game exists for the chat (group commands).
+
+    The handler runs under the chat lock. If it returns a coroutine (its DM
+    fan-out), that is awaited after the lock is released so slow sends
+    don't hold up the chat's other updates.
+    """
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat = update.effective_chat
+        if not chat:
+            return
+        if chat.type == "private":
+            await update.effective_message.reply_text("Use this command in the group game chat.")
+            return
+        async with REGISTRY.lock(chat.id):
+            game = REGISTRY.get_game(chat.id)
+            if not game:
+                await update.effective_message.reply_text("No game in this chat. Use /newgame to start.")
+                return
+            followup = await func(update, context, game)
+        if followup is not None:
+            await followup
+    return wrapper
+
+
+def require_player_game(func):
+    """Decorator for DM commands: find the caller's game and hold its chat lock."""
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        chat_id = REGISTRY.player_to_game.get(user.id)
+        if chat_id is None:
+            await update.effective_message.reply_text("You are not currently in a game.")
+            return
+        async with REGISTRY.lock(chat_id):
+            game = REGISTRY.get_game(chat_id)
+            if not game:
+                await update.effective_message.reply_text("You are not currently in a game.")
+                return
+            return await func(update, context, game)
+    return wrapper
+
+
+async def send_to_players(players: List[PlayerState], send, what: str):
+    """Run send(p) for every player concurrently, logging failures per player.
+
+    The application's AIORateLimiter paces the actual requests to Telegram.
+    """
+    results = await asyncio.gather(*(send(p) for p in players), return_exceptions=True)
+    for p, result in zip(players, results):
+        if isinstance(result, Exception):
+            logger.error("Failed to %s %s: %s", what, p.user_id, result)
+
+
+def card_name(card_id: str) -> str:
+    card = CARD_CATALOG.get(card_id)
+    return card.name if card else card_id
+
+
+def card_cost(card_id: str):
+    card = CARD_CATALOG.get(card_id)
+    return card.cost if card else 1
+
+
+def card_desc(card_id: str) -> str:
+    card = CARD_CATALOG.get(card_id)
+    return card.description if card else ""
+
+
+def is_vote_card(card_id: str) -> bool:
+    """Very simple heuristic: card whose description starts with/contains 'Cast' and 'vote'."""
+    desc = card_desc(card_id).lower()
+    return "cast" in desc and "vote" in desc
+
+
+def reshuffle_discard(game: GameState, player: PlayerState) -> bool:
+    """Turn the discard into the deck when the deck is empty; False if there is nothing to draw."""
+    if not player.deck:
+        if not player.discard:
+            return False
+        # Swap buffers so the discard becomes the deck without copying
+        player.deck, player.discard = player.discard, player.deck
+        game.rng.shuffle(player.deck)
+    return True
+
+
+def draw_cards(game: GameState, player: PlayerState, n: int) -> bytearray:
+    """Draw up to n cards, taking each run off the deck in one slice."""
+    drawn = bytearray()
+    need = max(0, n)
+    while need and reshuffle_discard(game, player):
+        take = min(need, len(player.deck))
+        # Same order as popping one card at a time from the top (end) of the deck
+        chunk = player.deck[-take:]
+        del player.deck[-take:]
+        chunk.reverse()
+        drawn += chunk
+        need -= take
+    player.hand += drawn
+    return drawn
+
+
+def take_from_hand(player: PlayerState, idx: int) -> int:
+    """Remove and return the card at idx; the last card fills the gap, so hand order isn't kept."""
+    hand = player.hand
+    ci = hand[idx]
+    last = hand.pop()
+    if idx < len(hand):
+        hand[idx] = last
+    return ci
+
+
+def discard_random(game: GameState, player: PlayerState, count: int = 1):
+    """Discard random cards from hand."""
+    for _ in range(max(0, count)):
+        if not player.hand:
+            return
+        idx = game.rng.randrange(len(player.hand))
+        ci = take_from_hand(player, idx)
+        player.discard.append(ci)
+        player.cards_discarded_this_round.append(ci)
+
+
+def record_action(game: GameState, src: int, ci: int, tgt: Optional[int], x_value: int):
+    """Log a played card (by CARD_INDEX) and add its plain votes/blocks to the players' round tallies."""
+    game.actions.append(Action(source_id=src, card_index=ci, target_id=tgt, x_value=x_value))
+
+    players = game.players
+    votes, self_blocks, ally_votes, ally_blocks = CARD_TALLY[ci]
+
+    # Simple blocks
+    if self_blocks:
+        # most block cards are self-targeted; for simplicity apply to source
+        players[src].blocks_incoming += self_blocks
+
+    if tgt is None:
+        return
+
+    # Simple votes, plus what the starter ally helpers put on their target
+    if votes:
+        players[src].votes_cast_this_round += votes
+    if votes or ally_votes or ally_blocks:
+        target = players[tgt]
+        target.votes_received_this_round += votes + ally_votes
+        target.blocks_incoming += ally_blocks
+
+
+@lru_cache(maxsize=1024)
+def _hand_listing(hand: bytes) -> str:
+    """Numbered card lines for a hand; the same hand is re-rendered on every refresh."""
+    if not hand:
+        return " - (empty)"
+    labels = CARD_HAND_LABELS
+    return "\n".join([f"{idx+1}. {labels[ci]}" for idx, ci in enumerate(hand)])
+
+
+def format_hand(player: PlayerState) -> str:
+    return f"Energy: {player.energy}/{player.energy_max}\nYour hand:\n{_hand_listing(bytes(player.hand))}"
+
+
+def list_alive_players(game: GameState) -> List[PlayerState]:
+    """Snapshot of alive players; use game.alive_players directly for counts and lookups."""
+    return list(game.alive_players.values())
+
+
+def list_common_uncommon_ids() -> Tuple[str, ...]:
+    return COMMON_UNCOMMON_IDS
+
+
+# =========================
+# Commands: Group
+# =========================
+
+async def help_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    text = (
+        "🎮 *Last Hand Standing – Commands*\n\n"
+        "*Group commands:*\n"
+        "/newgame [seed=N] – Start a new game in this group\n"
+        "/join – Join the current game\n"
+        "/startgame – Initialize decks (host only)\n"
+        "/nextround – Begin the next round (host only)\n"
+        "/resolve – Resolve all played cards and eliminate (host only)\n"
+        "/players – List all players (alive & eliminated)\n"
+        "/status – Show round, phase, and player status\n"
+        "/readycheck – Show who hasn’t finished actions (host only)\n"
+        "/camp – Camp phase: upgrade/remove a card (host only)\n"
+        "/reward – Extra draft of 3 cards (host only; manual)\n"
+        "/endgame – End the current game early (host only)\n\n"
+        "*DM commands:*\n"
+        "/start – Info & help (in DM)\n"
+        "/deck – View your deck\n"
+        "/remove N – Remove the Nth card from your deck\n"
+        "/upgrade N – Upgrade the Nth card in your deck\n"
+    )
+    await update.effective_message.reply_text(text, parse_mode="Markdown")
+
+
+async def newgame(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat = update.effective_chat
+    user = update.effective_user
+    if chat.type == "private":
+        await update.effective_message.reply_text("Please use /newgame in a GROUP chat.")
+        return
+
+    seed = None
+    for arg in context.args or []:
+        if arg.startswith("seed="):
+            try:
+                seed = int(arg[len("seed="):])
+            except ValueError:
+                await update.effective_message.reply_text("Seed must be a number, e.g. /newgame seed=1234")
+                return
+
+    game = GameState(chat_id=chat.id, host_id=user.id)
+    if seed is not None:
+        game.rng.seed(seed)
+    async with REGISTRY.lock(chat.id):
+        REGISTRY.add_game(game)
+    await update.effective_message.reply_text(
+        f"🎮 New Last Hand Standing game created by {user.mention_html()}!\n"
+        "Players can now /join.\n"
+        "When ready, host can /startgame and then /nextround.",
+        parse_mode="HTML",
+    )
+
+
+@require_game
+async def join(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
+    user = update.effective_user
+    if not game.joining_open:
+        await update.effective_message.reply_text("Joining is closed for this game.")
+        return
+    if user.id in game.players:
+        await update.effective_message.reply_text("You are already in the game.")
+        return
+
+    username = user.full_name or user.username or str(user.id)
+    ps = PlayerState(user_id=user.id, username=username)
+    game.players[user.id] = ps
+    game.alive_players[user.id] = ps
+    game.seats.append(user.id)
+    REGISTRY.player_to_game[user.id] = game.chat_id
+
+    await update.effective_message.reply_text(
+        f"{username} has joined the game! ({len(game.players)} players total)"
+    )
+
+
+@require_game
+async def startgame(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
+    user = update.effective_user
+    if user.id != game.host_id:
+        await update.effective_message.reply_text("Only the host can start the game.")
+        return
+    if len(game.players) < 2:
+        await update.effective_message.reply_text("Need at least 2 players to start.")
+        return
+
+    game.joining_open = False
+    game.round_number = 0
+    game.phase = "lobby"
+
+    for p in game.players.values():
+        p.deck = bytearray(STARTER_DECK_DEFAULT)
+        game.rng.shuffle(p.deck)
+        p.discard = bytearray()
+        p.hand = bytearray()
+        p.energy_max = 3
+        p.energy = 3
+        p.blocks = 0
+        p.turn_done = False
+        p.draft_done = False
+        p.camp_done = False
+        p.next_round_extra_cards = 0
+        p.next_round_energy_bonus = 0
+        p.cards_played_this_round.clear()
+        p.cards_discarded_this_round.clear()
+
+    await update.effective_message.reply_text(
+        "🃏 Game started! All players have the starter 10-card deck.\n"
+        "Host can now use /nextround to begin Round 1."
+    )
+
+
+@require_game
+async def players_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
+    alive, dead = [], []
+    for p in game.players.values():
+        (alive if p.alive else dead).append(p.username)
+
+    if not game.players:
+        await update.effective_message.reply_text("No players have joined yet.")
+        return
+
+    lines = ["👥 Players in this game", ""]
+    lines.append("Alive:")
+    if alive:
+        lines.extend(f" - {name}" for name in alive)
+    else:
+        lines.append(" - (none)")
+
+    lines.append("")
+    lines.append("Eliminated:")
+    if dead:
+        lines.extend(f" - {name}" for name in dead)
+    else:
+        lines.append(" - (none)")
+
+    await update.effective_message.reply_text("\n".join(lines))
+
+
+@require_game
+async def nextround(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
+    """
+    Start a new round:
+    - Discard old non-retain cards
+    - Keep retain cards in hand
+    - Reset energy/blocks
+    - Draw 5 + bonus new cards (no hand size cap)
+    - DM hands
+    """
+    user = update.effective_user
+    if user.id != game.host_id:
+        await update.effective_message.reply_text("Only the host can start a new round.")
+        return
+
+    alive = list_alive_players(game)
+    if len(alive) < 2:
+        await update.effective_message.reply_text("Not enough players alive to continue.")
+        return
+
+    game.round_number += 1
+    game.phase = "playing"
+    game.actions.clear()
+    game.keyboard_cache.clear()
+
+    await update.effective_message.reply_text(
+        f"🔄 Starting Round {game.round_number}! Discarding non-retain cards and dealing 5 new cards..."
+    )
+
+    for p in alive:
+        # Discard all non-retain cards in hand, marking which retain cards stayed
+        new_retained = 0
+        new_hand = bytearray()
+        for ci in p.hand:
+            if ci in RETAIN_INDICES:
+                new_hand.append(ci)  # stays in hand
+                new_retained |= 1 << ci
+            else:
+                p.discard.append(ci)
         p.hand = new_hand
 
         # Store which cards were retained (for "retained from last round" effects)
@@ -1966,10 +2273,12 @@ async def nextround(update: Update, context: ContextTypes.DEFAULT_TYPE, game: Ga
         p.blocks = 0
         p.votes_cast_this_round = 0
         p.votes_received_this_round = 0
+        p.blocks_incoming = 0
         p.cards_played_this_round.clear()
         p.cards_discarded_this_round.clear()
 
         # Reset phase flags
+        p.pending_play = None
         p.turn_done = False
         p.draft_done = False
         p.camp_done = False
@@ -1982,17 +2291,35 @@ async def nextround(update: Update, context: ContextTypes.DEFAULT_TYPE, game: Ga
         # Draw 5 + extra NEW cards (no cap including retained)
         draw_count = 5 + p.next_round_extra_cards
         p.next_round_extra_cards = 0
-        draw_cards(p, draw_count)
-
-        # DM their hand
-        try:
-            await send_hand_menu(context, game, p)
-        except Exception as e:
-            logger.error(f"Failed to DM player {p.user_id}: {e}")
+        draw_cards(game, p, draw_count)
+
+    # Render every hand while the lock is held; deal() only sends
+    round_number = game.round_number
+    views = {p.user_id: build_hand_view(game, p) for p in alive}
+    sent: Dict[int, int] = {}
+    send = context.bot.send_message
+
+    async def send_hand(p: PlayerState):
+        text, markup = views[p.user_id]
+        msg = await send(chat_id=p.user_id, text=text, reply_markup=markup)
+        sent[p.user_id] = msg.message_id
+
+    async def deal():
+        # DM everyone their hand at once
+        await send_to_players(alive, send_hand, "DM player")
+        async with REGISTRY.lock(game.chat_id):
+            if game.round_number == round_number:
+                for p in alive:
+                    # A tap on the new menu may already have recorded a fresher render
+                    message_id = sent.get(p.user_id)
+                    if message_id and p.hand_msg_id != message_id:
+                        p.hand_msg_id = message_id
+                        p.last_hand_rendered = views[p.user_id][0]
+        await update.effective_message.reply_text(
+            "Hands sent via DM. Players may now play cards until they are done. Host can /resolve at any time."
+        )
 
-    await update.effective_message.reply_text(
-        "Hands sent via DM. Players may now play cards until they are done. Host can /resolve at any time."
-    )
+    return deal()
 
 
 @require_game
@@ -2013,6 +2340,12 @@ async def resolve(update: Update, context: ContextTypes.DEFAULT_TYPE, game: Game
         await update.effective_message.reply_text("Not enough players alive to resolve.")
         return
 
+    # Votes stay tallied on the players until /nextround, so a round that
+    # already eliminated someone must not be resolved again.
+    if game.resolved_round == game.round_number:
+        await update.effective_message.reply_text("This round has already been resolved. Use /nextround first.")
+        return
+
     # Even if some players didn't hit 'Done', we just treat them as no actions.
     if not game.actions:
         await update.effective_message.reply_text(
@@ -2020,83 +2353,55 @@ async def resolve(update: Update, context: ContextTypes.DEFAULT_TYPE, game: Game
         )
         return
 
-    # Tally plain votes and blocks, based on simplified mapping.
-    votes_on: Dict[int, int] = {}
-    blocks_on: Dict[int, int] = {}
-
-    for act in game.actions:
-        cid = act.card_id
-        src = act.source_id
-        tgt = act.target_id
-
-        # Simple votes
-        if cid in VOTE_CARDS_SIMPLE and tgt is not None:
-            count = VOTE_CARDS_SIMPLE[cid]
-            votes_on[tgt] = votes_on.get(tgt, 0) + count
-            game.players[src].votes_cast_this_round += count
-            game.players[tgt].votes_received_this_round += count
-
-        # Simple blocks
-        if cid in BLOCK_CARDS_SIMPLE:
-            # most block cards are self-targeted; for simplicity apply to source
-            blocks_on[src] = blocks_on.get(src, 0) + BLOCK_CARDS_SIMPLE[cid]
-
-        # Special starter helpers
-        if cid == "ASSIST_ALLY" and tgt is not None:
-            votes_on[tgt] = votes_on.get(tgt, 0) + 1
-        if cid == "ASSIST_ALLY_UG" and tgt is not None:
-            votes_on[tgt] = votes_on.get(tgt, 0) + 2
-
-        if cid == "BLOCK_ALLY" and tgt is not None:
-            blocks_on[tgt] = blocks_on.get(tgt, 0) + 1
-        if cid == "BLOCK_ALLY_UG" and tgt is not None:
-            blocks_on[tgt] = blocks_on.get(tgt, 0) + 2
-
-    # Apply blocks: each block cancels 1 vote
-    final_votes: Dict[int, int] = {}
-    for pid, v in votes_on.items():
-        b = blocks_on.get(pid, 0)
-        final_votes[pid] = max(0, v - b)
-
-    if not final_votes:
+    # Votes and blocks were tallied onto the players as each card was played.
+    # One pass applies blocks (each cancels 1 vote), builds the results and
+    # tracks the top count; only players who drew votes are candidates.
+    lines = ["📊 Round results:"]
+    max_votes = -1
+    elim_players: List[PlayerState] = []
+    for p in alive_before:
+        votes = max(0, p.votes_received_this_round - p.blocks_incoming)
+        lines.append(f" - {p.username}: {votes} vote(s)")
+        if not p.votes_received_this_round:
+            continue
+        if votes > max_votes:
+            max_votes = votes
+            elim_players = [p]
+        elif votes == max_votes:
+            elim_players.append(p)
+
+    if not elim_players:
         await update.effective_message.reply_text(
             "After applying blocks, nobody has any votes. No one is eliminated."
         )
         return
 
     # Show results
-    lines = ["📊 Round results:"]
-    for p in list_alive_players(game):
-        v = final_votes.get(p.user_id, 0)
-        lines.append(f" - {p.username}: {v} vote(s)")
     await update.effective_message.reply_text("\n".join(lines))
 
-    max_votes = max(final_votes.values())
-    elim_ids = [pid for pid, v in final_votes.items() if v == max_votes]
-    elim_players = [game.players[pid] for pid in elim_ids if game.players[pid].alive]
+    game.resolved_round = game.round_number
+    for p in elim_players:
+        p.alive = False
+        game.alive_players.pop(p.user_id, None)
+    game.keyboard_cache.clear()
 
-    if not elim_players:
-        await update.effective_message.reply_text("No one is eliminated this round.")
+    if len(elim_players) == 1:
+        await update.effective_message.reply_text(f"❌ {elim_players[0].username} has been eliminated!")
     else:
-        for p in elim_players:
-            p.alive = False
-
-        if len(elim_players) == 1:
-            await update.effective_message.reply_text(f"❌ {elim_players[0].username} has been eliminated!")
-        else:
-            names = ", ".join(p.username for p in elim_players)
-            await update.effective_message.reply_text(
-                f"❌ Multiple players tied with {max_votes} votes and are eliminated: {names}"
-            )
+        names = ", ".join(p.username for p in elim_players)
+        await update.effective_message.reply_text(
+            f"❌ Multiple players tied with {max_votes} votes and are eliminated: {names}"
+        )
 
-    alive_after = list_alive_players(game)
-    if len(alive_after) == 1:
+    alive_count = len(game.alive_players)
+    if alive_count == 1:
+        winner = next(iter(game.alive_players.values()))
         await update.effective_message.reply_text(
-            f"🏆 {alive_after[0].username} is the LAST HAND STANDING! Game over."
+            f"🏆 {winner.username} is the LAST HAND STANDING! Game over."
         )
         game.phase = "finished"
         return
-    elif len(alive_after) == 0:
+    elif alive_count == 0:
         await update.effective_message.reply_text("Everyone has been eliminated. Chaos victory.")
         game.phase = "finished"
         return
@@ -2105,14 +2410,15 @@ async def resolve(update: Update, context: ContextTypes.DEFAULT_TYPE, game: Game
     await update.effective_message.reply_text(
         "📦 Round complete. Starting draft: each alive player will receive 3 random cards in DM to choose 1 or Skip."
     )
-    await reward(update, context, game)  # reuse reward logic as draft
-    # reward() will set phase="drafting"
+    # start_draft() sets phase="drafting"; its DMs go out once the lock is released
+    return await start_draft(update, context, game)
 
 
 @require_game
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
-    alive = [p for p in game.players.values() if p.alive]
-    dead = [p for p in game.players.values() if not p.alive]
+    alive, dead = [], []
+    for p in game.players.values():
+        (alive if p.alive else dead).append(p)
     lines = [
         f"🎮 Game status – Round {game.round_number}, phase: {game.phase}",
         "Alive:",
@@ -2133,16 +2439,21 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameS
 
 @require_game
 async def reward(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
-    """
-    Host command (and internal helper from /resolve):
-    send each alive player 3 random Common/Uncommon cards to add or skip.
-    Also used as the post-/resolve draft step.
-    """
+    """Host command: start a manual draft round."""
     user = update.effective_user
     if user.id != game.host_id:
         await update.effective_message.reply_text("Only the host can grant rewards / start drafts.")
         return
 
+    return await start_draft(update, context, game)
+
+
+async def start_draft(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
+    """
+    Deal each alive player 3 random Common/Uncommon cards to add or skip.
+    Used by /reward and as the post-/resolve draft step; the caller holds the
+    chat lock and gets back the coroutine that DMs the offers.
+    """
     pool = list_common_uncommon_ids()
     if not pool:
         await update.effective_message.reply_text("No common/uncommon cards configured.")
@@ -2158,40 +2469,45 @@ async def reward(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameS
 
     for p in alive:
         # sample 3 distinct cards (or with replacement if fewer in pool)
-        offers = random.sample(pool, k=min(3, len(pool)))
-        game.reward_offers[p.user_id] = offers
+        game.reward_offers[p.user_id] = game.rng.sample(pool, k=min(3, len(pool)))
         p.draft_done = False
 
-        buttons = []
-        for cid in offers:
-            buttons.append([
+    # Same for every player in this draft; buttons are immutable, so the Skip row is shared
+    send = context.bot.send_message
+    round_number = game.round_number
+    skip_row = [InlineKeyboardButton(text="Skip", callback_data=encode_cb(game.game_id, round_number, CB_REWARD_SKIP))]
+
+    # Render every offer while the lock is held; deliver() only sends
+    views: Dict[int, Tuple[str, InlineKeyboardMarkup]] = {}
+    for p in alive:
+        offers = game.reward_offers[p.user_id]
+        buttons = [
+            [
                 InlineKeyboardButton(
                     text=f"Take {card_name(cid)}",
-                    callback_data=f"reward_pick|{game.chat_id}|{p.user_id}|{cid}"
+                    callback_data=encode_cb(game.game_id, round_number, CB_REWARD_PICK, CARD_INDEX[cid]),
                 )
-            ])
-        buttons.append([
-            InlineKeyboardButton(
-                text="Skip",
-                callback_data=f"reward_skip|{game.chat_id}|{p.user_id}"
-            )
-        ])
+            ]
+            for cid in offers
+        ]
+        buttons.append(skip_row)
+        views[p.user_id] = (
+            "📦 Draft / Reward! Choose one card to add to your deck or skip:\n\n" +
+            "\n".join(f"- {card_name(cid)} – {card_desc(cid)}" for cid in offers),
+            InlineKeyboardMarkup(buttons),
+        )
 
-        try:
-            await context.bot.send_message(
-                chat_id=p.user_id,
-                text=(
-                    "📦 Draft / Reward! Choose one card to add to your deck or skip:\n\n" +
-                    "\n".join(f"- {card_name(cid)} – {card_desc(cid)}" for cid in offers)
-                ),
-                reply_markup=InlineKeyboardMarkup(buttons),
-            )
-        except Exception as e:
-            logger.error(f"Failed to send reward DM to {p.user_id}: {e}")
+    async def send_offers(p: PlayerState):
+        text, markup = views[p.user_id]
+        await send(chat_id=p.user_id, text=text, reply_markup=markup)
 
-    await update.effective_message.reply_text(
-        "Draft choices sent to all alive players via DM."
-    )
+    async def deliver():
+        await send_to_players(alive, send_offers, "send reward DM to")
+        await update.effective_message.reply_text(
+            "Draft choices sent to all alive players via DM."
+        )
+
+    return deliver()
 
 
 @require_game
@@ -2246,30 +2562,34 @@ async def camp(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameSta
 
     for p in alive:
         p.camp_done = False
+
+    send = context.bot.send_message
+    chat_id = game.chat_id
+
+    async def send_camp(p: PlayerState):
         buttons = [
             [
                 InlineKeyboardButton(
-                    text="⬆️ Upgrade a card", callback_data=f"camp_upgrade|{game.chat_id}|{p.user_id}"
+                    text="⬆️ Upgrade a card", callback_data=f"camp_upgrade|{chat_id}|{p.user_id}"
                 )
             ],
             [
                 InlineKeyboardButton(
-                    text="🗑 Remove a card", callback_data=f"camp_remove|{game.chat_id}|{p.user_id}"
+                    text="🗑 Remove a card", callback_data=f"camp_remove|{chat_id}|{p.user_id}"
                 )
             ],
         ]
-        try:
-            await context.bot.send_message(
-                chat_id=p.user_id,
-                text=(
-                    "🏕 You arrived at camp!\n\n"
-                    "Choose whether to *upgrade* a card or *remove* a card from your deck."
-                ),
-                reply_markup=InlineKeyboardMarkup(buttons),
-                parse_mode="Markdown",
-            )
-        except Exception as e:
-            logger.error(f"Failed to DM camp to {p.user_id}: {e}")
+        await send(
+            chat_id=p.user_id,
+            text=(
+                "🏕 You arrived at camp!\n\n"
+                "Choose whether to *upgrade* a card or *remove* a card from your deck."
+            ),
+            reply_markup=InlineKeyboardMarkup(buttons),
+            parse_mode="Markdown",
+        )
+
+    return send_to_players(alive, send_camp, "DM camp to")
 
 
 @require_game
@@ -2281,19 +2601,18 @@ async def endgame(update: Update, context: ContextTypes.DEFAULT_TYPE, game: Game
 
     await update.effective_message.reply_text("🛑 The host has ended the game early.")
 
-    # DM all players
-    for p in game.players.values():
-        try:
-            await context.bot.send_message(
-                chat_id=p.user_id,
-                text="🛑 The current Last Hand Standing game has been ended by the host.",
-            )
-        except Exception:
-            pass
-
     game.phase = "finished"
-    if game.chat_id in GAMES:
-        del GAMES[game.chat_id]
+    REGISTRY.remove_game(game.chat_id)
+
+    # DM all players
+    return send_to_players(
+        list(game.players.values()),
+        lambda p: context.bot.send_message(
+            chat_id=p.user_id,
+            text="🛑 The current Last Hand Standing game has been ended by the host.",
+        ),
+        "send end-of-game DM to",
+    )
 
 
 # =========================
@@ -2312,13 +2631,9 @@ async def start_private(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def deck_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@require_player_game
+async def deck_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
     user = update.effective_user
-    game = get_game_for_player(user.id)
-    if not game:
-        await update.effective_message.reply_text("You are not currently in a game.")
-        return
-
     p = game.players.get(user.id)
     if not p:
         await update.effective_message.reply_text("You are not a player in this game.")
@@ -2329,20 +2644,16 @@ async def deck_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     lines = ["📦 Your deck:"]
-    for i, cid in enumerate(p.deck):
-        lines.append(f"{i+1}. {card_name(cid)} ({cid})")
+    for i, ci in enumerate(p.deck):
+        lines.append(f"{i+1}. {CARD_BY_INDEX[ci].name} ({CARD_IDS[ci]})")
     lines.append("\nUse /remove N or /upgrade N in this DM to modify your deck.")
 
     await update.effective_message.reply_text("\n".join(lines))
 
 
-async def remove_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@require_player_game
+async def remove_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
     user = update.effective_user
-    game = get_game_for_player(user.id)
-    if not game:
-        await update.effective_message.reply_text("You are not currently in a game.")
-        return
-
     p = game.players.get(user.id)
     if not p:
         await update.effective_message.reply_text("You are not a player in this game.")
@@ -2364,18 +2675,14 @@ async def remove_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     removed = p.deck.pop(idx)
     await update.effective_message.reply_text(
-        f"Removed {card_name(removed)} from your deck."
+        f"Removed {CARD_BY_INDEX[removed].name} from your deck."
     )
 
 
-async def upgrade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@require_player_game
+async def upgrade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE, game: GameState):
     """Upgrade using the explicit *_UG cards."""
     user = update.effective_user
-    game = get_game_for_player(user.id)
-    if not game:
-        await update.effective_message.reply_text("You are not currently in a game.")
-        return
-
     p = game.players.get(user.id)
     if not p:
         await update.effective_message.reply_text("You are not a player in this game.")
@@ -2395,7 +2702,7 @@ async def upgrade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.effective_message.reply_text("Invalid card number.")
         return
 
-    old_id = p.deck[idx]
+    old_id = CARD_IDS[p.deck[idx]]
     new_id = UPGRADE_MAP.get(old_id)
     if not new_id:
         await update.effective_message.reply_text(
@@ -2403,7 +2710,7 @@ async def upgrade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    p.deck[idx] = new_id
+    p.deck[idx] = CARD_INDEX[new_id]
     await update.effective_message.reply_text(
         f"Upgraded {card_name(old_id)} to {card_name(new_id)}."
     )
@@ -2413,84 +2720,73 @@ async def upgrade_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # Card play UI (DM)
 # =========================
 
-def is_card_playable(p: PlayerState, cid: str) -> bool:
-    """Check if card can be played right now given energy and cost."""
-    cost = card_cost(cid)
-    if cost is None:
-        # Curse/unplayable
-        return False
-    if cost == "X":
-        return p.energy > 0
-    try:
-        c_int = int(cost)
-    except Exception:
-        c_int = 1
-    return p.energy >= c_int
+# Compact callback kinds, and the pipe-separated kind each one expands to
+CB_TARGET, CB_PLAY, CB_INFO, CB_DONE, CB_BACK, CB_REWARD_PICK, CB_REWARD_SKIP = range(7)
+_CB_NAMES = ("target", "playcard", "info", "done", "backtohand", "reward_pick", "reward_skip")
 
 
-async def send_hand_menu(context: ContextTypes.DEFAULT_TYPE, game: GameState, p: PlayerState):
-    """Send the 'play cards' menu for a player with Play + Info buttons."""
-    buttons = []
+def encode_cb(game_id: int, round_id: int, kind: int, arg: int = 0) -> str:
+    """Pack a callback as hex: game_id, then round (mod 16), kind and a one-byte argument.
 
-    for idx, cid in enumerate(p.hand):
-        cost = card_cost(cid)
-        cost_str = "X" if cost == "X" else ("-" if cost is None else str(cost))
-        playable = is_card_playable(p, cid)
+    The argument is a seat for targets and a CARD_INDEX value for
+    play/info/reward buttons.
+    """
+    # A wider argument would spill into the game id when decoded
+    assert 0 <= arg < 256, "compact callback argument must fit in a byte"
+    return f"{game_id:x}{round_id & 0xF:x}{kind:x}{arg:02x}"
 
-        label = f"{idx+1}. {card_name(cid)} (cost {cost_str})"
-        row = []
-        if playable:
-            row.append(
-                InlineKeyboardButton(
-                    text=f"▶ {label}",
-                    callback_data=f"playcard|{game.chat_id}|{p.user_id}|{idx}",
-                )
-            )
-        row.append(
-            InlineKeyboardButton(
-                text="ℹ️ Info",
-                callback_data=f"info|{game.chat_id}|{p.user_id}|{idx}",
-            )
-        )
-        buttons.append(row)
 
-    # Add Done button
-    buttons.append([
-        InlineKeyboardButton(
-            text="✅ Done playing",
-            callback_data=f"done|{game.chat_id}|{p.user_id}"
-        )
-    ])
+def decode_cb(data: str) -> Tuple[int, int, int, int]:
+    """(game_id, round, kind, arg); raises ValueError if data isn't a compact callback."""
+    return int(data[:-4], 16), int(data[-4], 16), int(data[-3], 16), int(data[-2:], 16)
 
-    text = f"Round {game.round_number}\n{format_hand(p)}\n\nTap ▶ to play cards, ℹ️ for details, then tap Done."
 
-    await context.bot.send_message(
-        chat_id=p.user_id,
-        text=text,
-        reply_markup=InlineKeyboardMarkup(buttons),
-    )
+def is_card_playable(energy: int, ci: int) -> bool:
+    """Check if card (by CARD_INDEX) can be played right now given energy and cost."""
+    flags = CARD_COST_FLAGS[ci]
+    if flags & COST_UNPLAYABLE:
+        return False
+    if flags & COST_X:
+        return energy > 0
+    return energy >= CARD_COST_ENERGY[ci]
 
 
-async def refresh_hand_message(query, context: ContextTypes.DEFAULT_TYPE, game: GameState, p: PlayerState):
-    buttons = []
-    for idx, cid in enumerate(p.hand):
-        cost = card_cost(cid)
-        cost_str = "X" if cost == "X" else ("-" if cost is None else str(cost))
-        playable = is_card_playable(p, cid)
+def get_target_keyboard(game: GameState, p: PlayerState) -> InlineKeyboardMarkup:
+    """Target picker listing every other alive player, built once per round per player."""
+    key = (game.round_number, p.user_id)
+    markup = game.keyboard_cache.get(key)
+    if markup is None:
+        markup = game.keyboard_cache[key] = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton(
+                    text=pl.username,
+                    callback_data=encode_cb(game.game_id, game.round_number, CB_TARGET, slot),
+                )
+            ]
+            for slot, pl in enumerate(game.players.values())  # same order as game.seats
+            if pl.alive and pl.user_id != p.user_id
+        ])
+    return markup
 
-        label = f"{idx+1}. {card_name(cid)} (cost {cost_str})"
+
+@lru_cache(maxsize=1024)
+def _hand_markup(game_id: int, round_number: int, hand: bytes, energy: int) -> InlineKeyboardMarkup:
+    """Play/Info rows plus Done; depends only on game, round, hand and energy, so it's memoized."""
+    buttons = []
+    for idx, ci in enumerate(hand):
+        label = f"{idx+1}. {CARD_HAND_LABELS[ci]}"
         row = []
-        if playable:
+        if is_card_playable(energy, ci):
             row.append(
                 InlineKeyboardButton(
                     text=f"▶ {label}",
-                    callback_data=f"playcard|{game.chat_id}|{p.user_id}|{idx}"
+                    callback_data=encode_cb(game_id, round_number, CB_PLAY, ci),
                 )
             )
         row.append(
             InlineKeyboardButton(
                 text="ℹ️ Info",
-                callback_data=f"info|{game.chat_id}|{p.user_id}|{idx}",
+                callback_data=encode_cb(game_id, round_number, CB_INFO, ci),
             )
         )
         buttons.append(row)
@@ -2498,15 +2794,29 @@ async def refresh_hand_message(query, context: ContextTypes.DEFAULT_TYPE, game:
     buttons.append([
         InlineKeyboardButton(
             text="✅ Done playing",
-            callback_data=f"done|{game.chat_id}|{p.user_id}"
+            callback_data=encode_cb(game_id, round_number, CB_DONE),
         )
     ])
+    return InlineKeyboardMarkup(buttons)
+
 
+def build_hand_view(game: GameState, p: PlayerState) -> Tuple[str, InlineKeyboardMarkup]:
     text = f"Round {game.round_number}\n{format_hand(p)}\n\nTap ▶ to play cards, ℹ️ for details, then tap Done."
+    return text, _hand_markup(game.game_id, game.round_number, bytes(p.hand), p.energy)
+
+
+async def refresh_hand_message(query, context: ContextTypes.DEFAULT_TYPE, game: GameState, p: PlayerState):
+    text, markup = build_hand_view(game, p)
+    # Buttons only depend on hand and energy, both of which are in the text
+    if query.message.message_id == p.hand_msg_id and text == p.last_hand_rendered:
+        return
+
     await query.edit_message_text(
         text=text,
-        reply_markup=InlineKeyboardMarkup(buttons),
+        reply_markup=markup,
     )
+    p.hand_msg_id = query.message.message_id
+    p.last_hand_rendered = text
 
 
 # =========================
@@ -2516,10 +2826,140 @@ async def refresh_hand_message(query, context: ContextTypes.DEFAULT_TYPE, game:
 def add_curse_to_draw_pile(p: PlayerState, count: int = 1):
     """Add CURSE cards to the player's draw pile (discard, then reshuffle when needed)."""
     for _ in range(max(0, count)):
-        p.discard.append("CURSE")
+        p.discard.append(CURSE_INDEX)
+
+
+def _effect_draw(game: GameState, p: PlayerState, text: EffectText):
+    # Heuristic: "draw N cards" patterns, parsed from the text at import.
+    # This won't be perfect for every card but covers most.
+    if text.fill_to:
+        # EXPERT / EXPERT_UG
+        draw_cards(game, p, max(0, text.fill_to - len(p.hand)))
+    elif text.draw:
+        draw_cards(game, p, text.draw)
+
+
+def _effect_draw_1(game: GameState, p: PlayerState, text: EffectText):
+    # Escape, Bring it On – one card on top of the text draw
+    draw_cards(game, p, 1)
+
+
+def _effect_balance(game: GameState, p: PlayerState, text: EffectText):
+    # "Draw N cards. Discard 1 card."
+    if text.draw in (3, 4):
+        draw_cards(game, p, text.draw)
+    if p.hand:
+        discard_random(game, p, 1)
+
+
+def _effect_vote_throw(game: GameState, p: PlayerState, text: EffectText):
+    # Draw 1, discard 1
+    draw_cards(game, p, 1)
+    if p.hand:
+        discard_random(game, p, 1)
+
+
+def _effect_backpack(game: GameState, p: PlayerState, text: EffectText):
+    # Draw 1, discard 1 (or 2/2)
+    if text.draw == 2:
+        draw_cards(game, p, 2)
+        discard_random(game, p, min(2, len(p.hand)))
+    else:
+        draw_cards(game, p, 1)
+        if p.hand:
+            discard_random(game, p, 1)
+
+
+def _effect_gamble(game: GameState, p: PlayerState, text: EffectText):
+    # Discard your hand, then draw that many cards.
+    old_count = len(p.hand)
+    while p.hand:
+        card = p.hand.pop()
+        p.discard.append(card)
+        p.cards_discarded_this_round.append(card)
+    draw_cards(game, p, old_count)
+
+
+def _effect_flip(game: GameState, p: PlayerState, text: EffectText):
+    # Draw extra cards compared to base
+    draw_cards(game, p, 3 if text.draw == 3 else 2)
+
+
+def _effect_group_talk(game: GameState, p: PlayerState, text: EffectText):
+    # Next-round extra card(s)
+    p.next_round_extra_cards += text.next_round_cards
+
+
+def _effect_energy_battery(game: GameState, p: PlayerState, text: EffectText):
+    p.next_round_energy_bonus += 1
+
+
+def _effect_energy_surge(game: GameState, p: PlayerState, text: EffectText):
+    p.energy += 2
+
+
+def _effect_turbo_time(game: GameState, p: PlayerState, text: EffectText):
+    # Turbo Time gives immediate energy; its curse comes from the text flag
+    p.energy += 3 if text.gains_3e else 2
 
 
-def apply_immediate_effect(game: GameState, p: PlayerState, cid: str, target: Optional[PlayerState], x_value: int):
+def _effect_curse(game: GameState, p: PlayerState, text: EffectText):
+    add_curse_to_draw_pile(p, 1)
+
+
+def _effect_survive(game: GameState, p: PlayerState, text: EffectText):
+    # additional block handled via BLOCK_CARDS_SIMPLE in resolve
+    # here we only implement the discard 1 card clause
+    if p.hand:
+        discard_random(game, p, 1)
+
+
+def _effect_trash(game: GameState, p: PlayerState, text: EffectText):
+    # Trash – very simplified: discard 1 random card and gain 1 energy
+    if p.hand:
+        discard_random(game, p, 1)
+        p.energy += 1
+
+
+EffectHandler = Callable[[GameState, PlayerState, EffectText], None]
+
+# On-play steps per card family (base id; its _UG version shares them), in the order they run.
+# We intentionally leave many of the more complex conditional effects
+# (like "for each curse", "if discarded while scrying", etc.)
+# as future work to keep this engine manageable.
+_EFFECT_FAMILIES: Dict[str, Tuple[EffectHandler, ...]] = {
+    "QUICK_DRAW": (_effect_draw,),
+    "SLIM": (_effect_draw,),
+    "BATTLE_CRY": (_effect_draw,),
+    "CARD_DRAW_2": (_effect_draw,),
+    "EXPERT": (_effect_draw,),
+    "OVERLOAD": (_effect_draw,),
+    "SCRAPS": (_effect_draw,),
+    "POUND_VOTE": (_effect_draw,),
+    "BALANCE": (_effect_draw, _effect_balance),
+    "VOTE_THROW": (_effect_vote_throw,),
+    "BACKPACK": (_effect_draw, _effect_backpack),
+    "GAMBLE": (_effect_draw, _effect_gamble),
+    "ESCAPE": (_effect_draw, _effect_draw_1),
+    "BRING_IT_ON": (_effect_draw, _effect_draw_1),
+    "FLIP": (_effect_draw, _effect_flip),
+    "GROUP_TALK": (_effect_group_talk,),
+    "ENERGY_BATTERY": (_effect_energy_battery,),
+    "ENERGY_SURGE": (_effect_energy_surge,),
+    "TURBO_TIME": (_effect_draw, _effect_turbo_time),
+    "SURVIVE": (_effect_survive,),
+    "TRASH": (_effect_trash,),
+}
+
+# Handlers per card index, resolved once so playing a card is a single table lookup
+CARD_EFFECT_HANDLERS: Tuple[Tuple[EffectHandler, ...], ...] = tuple(
+    _EFFECT_FAMILIES.get(cid[:-3] if cid.endswith("_UG") else cid, ())
+    + ((_effect_curse,) if CARD_EFFECT_TEXT[ci].adds_curse else ())
+    for ci, cid in enumerate(CARD_IDS)
+)
+
+
+def apply_immediate_effect(game: GameState, p: PlayerState, ci: int, target: Optional[PlayerState], x_value: int):
     """
     Handle the immediate on-play effects that don't wait for /resolve.
     This is intentionally conservative: we implement the common straightforward parts:
@@ -2530,282 +2970,212 @@ def apply_immediate_effect(game: GameState, p: PlayerState, cid: str, target: Op
       - Curse insertion
     Complex text (multi-target splits, conditional scaling, etc.) is mostly left for /resolve or future work.
     """
-    desc = card_desc(cid).lower()
-
     # Track that card was played
-    p.cards_played_this_round.append(cid)
-
-    # Simple draw effects (very coarse but effective)
-    if cid in {
-        "QUICK_DRAW", "QUICK_DRAW_UG",
-        "SLIM", "SLIM_UG",
-        "BATTLE_CRY", "BATTLE_CRY_UG",
-        "BALANCE", "BALANCE_UG",
-        "CARD_DRAW_2", "CARD_DRAW_2_UG",
-        "EXPERT", "EXPERT_UG",
-        "GAMBLE", "GAMBLE_UG",
-        "BACKPACK", "BACKPACK_UG",
-        "OVERLOAD", "OVERLOAD_UG",
-        "SCRAPS", "SCRAPS_UG",
-        "BRING_IT_ON", "BRING_IT_ON_UG",
-        "FLIP", "FLIP_UG",
-        "POUND_VOTE", "POUND_VOTE_UG",
-        "SLIM", "SLIM_UG",
-        "TURBO_TIME", "TURBO_TIME_UG",
-        "ESCAPE", "ESCAPE_UG",
-    }:
-        # Heuristic: look for "draw N cards" patterns.
-        # This won't be perfect for every card but covers most.
-        if "draw cards until you have 5" in desc:
-            # EXPERT
-            draw_cards(p, max(0, 5 - len(p.hand)))
-        elif "draw cards until you have 6" in desc:
-            # EXPERT_UG
-            draw_cards(p, max(0, 6 - len(p.hand)))
-        elif "draw 4 cards" in desc:
-            draw_cards(p, 4)
-        elif "draw 3 cards" in desc:
-            draw_cards(p, 3)
-        elif "draw 2 cards" in desc:
-            draw_cards(p, 2)
-        elif "draw 1 card" in desc:
-            draw_cards(p, 1)
-
-    # Balance / Vote Throw / Backpack discard-then-draw style
-    if cid in {"BALANCE", "BALANCE_UG"}:
-        # "Draw N cards. Discard 1 card."
-        if "draw 3 cards" in desc:
-            draw_cards(p, 3)
-        elif "draw 4 cards" in desc:
-            draw_cards(p, 4)
-        if p.hand:
-            discard_random(p, 1)
+    p.cards_played_this_round.append(ci)
 
-    if cid in {"VOTE_THROW", "VOTE_THROW_UG"}:
-        # Draw 1, discard 1
-        draw_cards(p, 1)
-        if p.hand:
-            discard_random(p, 1)
-
-    if cid in {"BACKPACK", "BACKPACK_UG"}:
-        # Draw 1, discard 1 (or 2/2)
-        if "draw 2 cards" in desc:
-            draw_cards(p, 2)
-            discard_random(p, min(2, len(p.hand)))
-        else:
-            draw_cards(p, 1)
-            if p.hand:
-                discard_random(p, 1)
-
-    if cid in {"GAMBLE", "GAMBLE_UG"}:
-        # Discard your hand, then draw that many cards.
-        old_count = len(p.hand)
-        while p.hand:
-            card = p.hand.pop()
-            p.discard.append(card)
-            p.cards_discarded_this_round.append(card)
-        draw_cards(p, old_count)
-
-    # Escape, Bring it On, Flip – add draw + simple blocks logic handled here
-    if cid in {"ESCAPE", "ESCAPE_UG"}:
-        draw_cards(p, 1)
-    if cid in {"BRING_IT_ON", "BRING_IT_ON_UG"}:
-        draw_cards(p, 1)
-    if cid in {"FLIP", "FLIP_UG"}:
-        # Draw extra cards compared to base
-        if "draw 3 cards" in desc:
-            draw_cards(p, 3)
-        else:
-            draw_cards(p, 2)
+    text = CARD_EFFECT_TEXT[ci]
+    for handler in CARD_EFFECT_HANDLERS[ci]:
+        handler(game, p, text)
 
-    # Next-round extra card(s)
-    if cid in {"GROUP_TALK", "GROUP_TALK_UG"}:
-        if "gain +2 card next round" in desc:
-            p.next_round_extra_cards += 2
-        else:
-            p.next_round_extra_cards += 1
-
-    # Next-round energy
-    if cid in {"ENERGY_BATTERY", "ENERGY_BATTERY_UG"}:
-        p.next_round_energy_bonus += 1
-
-    # Same-round energy gain
-    if cid in {"ENERGY_SURGE", "ENERGY_SURGE_UG"}:
-        p.energy += 2
-    if cid in {"TURBO_TIME", "TURBO_TIME_UG"}:
-        # Turbo Time gives immediate energy and adds curses
-        if "gain 3e" in desc:
-            p.energy += 3
-        else:
-            p.energy += 2
 
-    # Curses
-    if "add a curse card to your draw pile" in desc:
-        add_curse_to_draw_pile(p, 1)
+# =========================
+# Callback Query Handler
+# =========================
 
-    # Simple block effects not fully handled by resolve map
-    if cid in {"SURVIVE", "SURVIVE_UG"}:
-        # additional block handled via BLOCK_CARDS_SIMPLE in resolve
-        # here we only implement the discard 1 card clause
-        if p.hand:
-            discard_random(p, 1)
+def expand_compact_cb(chat_id: int, user_id: int, fields: Tuple[int, int, int, int]) -> Optional[List[str]]:
+    """Turn a decoded compact callback into the pipe-separated form, or None if stale/invalid."""
+    game = REGISTRY.get_game(chat_id)
+    game_id, round_id, kind, arg = fields
+    if not game or game.game_id != game_id:
+        return None
+    if kind >= len(_CB_NAMES):
+        return None
+    # Draft picks stay valid across rounds; the handler checks the offer is still open
+    if kind not in (CB_REWARD_PICK, CB_REWARD_SKIP) and round_id != game.round_number & 0xF:
+        return None
 
-    # Trash – very simplified: discard 1 random card and gain 1 energy
-    if cid in {"TRASH", "TRASH_UG"}:
-        if p.hand:
-            discard_random(p, 1)
-            p.energy += 1
+    data = [_CB_NAMES[kind], str(chat_id), str(user_id)]
+    if kind == CB_TARGET:
+        if arg >= len(game.seats):
+            return None
+        data.append(str(game.seats[arg]))
+    elif kind in (CB_PLAY, CB_INFO, CB_REWARD_PICK):
+        if arg >= len(CARD_IDS):
+            return None
+        data.append(CARD_IDS[arg])
+    return data
 
-    # We intentionally leave many of the more complex conditional effects
-    # (like "for each curse", "if discarded while scrying", etc.)
-    # as future work to keep this engine manageable.
 
+async def alert(query, text: str) -> bool:
+    """Report a rejected tap as a popup, leaving the message as it was."""
+    await query.answer(text, show_alert=True)
+    return True
 
-# =========================
-# Callback Query Handler
-# =========================
 
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    await query.answer()
-    data = (query.data or "").split("|")
-
-    if not data:
-        return
-
+    answered = False
+    try:
+        answered = await route_callback(query, context)
+    finally:
+        # Branches that reject a tap answer it themselves with an alert; any
+        # other outcome, including a branch raising, still stops the spinner
+        if not answered:
+            await query.answer()
+
+
+async def route_callback(query, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Find the game for a callback and run it under the chat lock; True if already answered."""
+    raw = query.data or ""
+
+    if "|" in raw:
+        data = raw.split("|")
+        # Every callback carries the game's chat id right after its kind
+        if len(data) < 2:
+            return False
+        try:
+            chat_id = int(data[1])
+        except ValueError:
+            return False
+    else:
+        # Compact callbacks carry the game's short id in place of the chat id
+        try:
+            fields = decode_cb(raw)
+        except ValueError:
+            return False
+        chat_id = REGISTRY.chat_by_game_id.get(fields[0])
+        if chat_id is None:
+            return await alert(query, "That button has expired.")
+        data = None
+
+    async with REGISTRY.lock(chat_id):
+        if data is None:
+            data = expand_compact_cb(chat_id, query.from_user.id, fields)
+            if data is None:
+                return await alert(query, "That button has expired.")
+        return await handle_game_callback(query, context, data)
+
+
+async def handle_game_callback(query, context: ContextTypes.DEFAULT_TYPE, data: List[str]) -> bool:
     kind = data[0]
 
     # ----- Playing cards -----
     if kind == "playcard":
         if len(data) != 4:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
-        card_index = int(data[3])
+        cid = data[3]
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
 
         p = game.players.get(player_id)
         if not p or not p.alive:
-            await query.edit_message_text("You are not in the game or are eliminated.")
-            return
+            return await alert(query, "You are not in the game or are eliminated.")
 
-        if card_index < 0 or card_index >= len(p.hand):
-            await query.edit_message_text("Invalid card selection.")
-            return
+        # Buttons name the card, not its slot, so a reshuffled hand can't misfire
+        ci = CARD_INDEX.get(cid)
+        card_index = p.hand.find(ci) if ci is not None else -1
+        if card_index < 0:
+            return await alert(query, "Invalid card selection.")
 
-        cid = p.hand[card_index]
-        cost = card_cost(cid)
+        flags = CARD_COST_FLAGS[ci]
 
         # Unplayable cards (curses, etc.)
-        if cost is None:
-            await query.edit_message_text("That card cannot be played.")
-            return
+        if flags & COST_UNPLAYABLE:
+            return await alert(query, "That card cannot be played.")
 
         # Determine energy cost
-        if cost == "X":
+        c_int = CARD_COST_ENERGY[ci]
+        if flags & COST_X:
             if p.energy <= 0:
-                await query.edit_message_text("You have no energy left for an X-cost card.")
-                return
+                return await alert(query, "You have no energy left for an X-cost card.")
             energy_spent = p.energy
             x_value = p.energy
         else:
-            try:
-                c_int = int(cost)
-            except Exception:
-                c_int = 1
             if p.energy < c_int:
-                await query.edit_message_text("Not enough energy for that card.")
-                return
+                return await alert(query, "Not enough energy for that card.")
             energy_spent = c_int
             x_value = 0
 
         p.energy -= energy_spent
 
         # Determine target type
-        target_mode = CARD_CATALOG.get(cid, {}).get("target", "other")
+        target_mode = CARD_BY_INDEX[ci].target
         if target_mode in ("self", "none"):
             # Immediately record action: self or no-target
             target_id = player_id if target_mode == "self" else None
-            act = Action(source_id=player_id, card_id=cid, target_id=target_id, x_value=x_value)
-            game.actions.append(act)
+            record_action(game, player_id, ci, target_id, x_value)
+
+            # The card leaves the hand before its effect can draw or discard
+            take_from_hand(p, card_index)
 
             # Apply immediate (non-vote) effects
             target_player = game.players.get(target_id) if target_id is not None else None
-            apply_immediate_effect(game, p, cid, target_player, x_value)
+            apply_immediate_effect(game, p, ci, target_player, x_value)
 
             # After playing, card goes to discard
-            p.discard.append(cid)
-            del p.hand[card_index]
+            p.discard.append(ci)
 
             await refresh_hand_message(query, context, game, p)
-            return
+            return False
 
         # Need to pick a target (current engine supports single target only)
-        alive = [pl for pl in game.players.values() if pl.alive and pl.user_id != player_id]
-        if not alive:
+        if len(game.alive_players) < 2:
             # no valid target; just discard the card
-            act = Action(source_id=player_id, card_id=cid, target_id=None, x_value=x_value)
-            game.actions.append(act)
-            apply_immediate_effect(game, p, cid, None, x_value)
-            p.discard.append(cid)
-            del p.hand[card_index]
+            record_action(game, player_id, ci, None, x_value)
+            take_from_hand(p, card_index)
+            apply_immediate_effect(game, p, ci, None, x_value)
+            p.discard.append(ci)
             await refresh_hand_message(query, context, game, p)
-            return
-
-        buttons = []
-        for pl in alive:
-            buttons.append([
-                InlineKeyboardButton(
-                    text=pl.username,
-                    callback_data=f"target|{chat_id}|{player_id}|{card_index}|{pl.user_id}|{x_value}"
-                )
-            ])
+            return False
 
+        p.pending_play = (ci, x_value)
+        p.last_hand_rendered = ""
         await query.edit_message_text(
             f"You selected {card_name(cid)} (spent {energy_spent} energy).\nChoose a target:",
-            reply_markup=InlineKeyboardMarkup(buttons),
+            reply_markup=get_target_keyboard(game, p),
         )
 
     elif kind == "target":
-        if len(data) != 6:
-            return
+        # target|chat_id|player_id|target_id (card and X come from p.pending_play)
+        if len(data) != 4:
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
-        card_index = int(data[3])
-        target_id = int(data[4])
-        x_value = int(data[5])
+        target_id = int(data[3])
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
 
         p = game.players.get(player_id)
         t = game.players.get(target_id)
         if not p or not p.alive or not t or not t.alive:
-            await query.edit_message_text("Invalid source or target.")
-            return
+            return await alert(query, "Invalid source or target.")
 
-        if card_index < 0 or card_index >= len(p.hand):
-            await query.edit_message_text("Invalid card.")
-            return
+        if p.pending_play is None:
+            return await alert(query, "Invalid card.")
+        ci, x_value = p.pending_play
+        p.pending_play = None
+        card_index = p.hand.find(ci)
+        if card_index < 0:
+            return await alert(query, "Invalid card.")
 
-        cid = p.hand[card_index]
+        cid = CARD_IDS[ci]
 
         # Special handling for ASSIST_ALLY (delegated vote)
         if cid in {"ASSIST_ALLY", "ASSIST_ALLY_UG"}:
             delegate = t  # the player who will choose where the vote goes
 
             # Move the card from hand to discard for the giver
-            p.discard.append(cid)
-            del p.hand[card_index]
+            take_from_hand(p, card_index)
+            p.discard.append(ci)
 
             # Build buttons for the delegate to secretly choose a target
-            alive_players = [pl for pl in game.players.values() if pl.alive]
+            alive_players = list_alive_players(game)
             buttons = []
             for pl in alive_players:
                 buttons.append([
@@ -2828,62 +3198,54 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     reply_markup=InlineKeyboardMarkup(buttons),
                 )
             except Exception as e:
-                logger.error(f"Failed to send assist vote DM to {delegate.user_id}: {e}")
+                logger.error("Failed to send assist vote DM to %s: %s", delegate.user_id, e)
                 # If DM fails, the assist is effectively lost
 
             # Refresh the giver's hand view
             await refresh_hand_message(query, context, game, p)
-            return
+            return False
 
         # Default behavior for all other targeted cards
         target_player = t
-        act = Action(source_id=player_id, card_id=cid, target_id=target_id, x_value=x_value)
-        game.actions.append(act)
+        record_action(game, player_id, ci, target_id, x_value)
+        take_from_hand(p, card_index)
 
         # Apply immediate side effects
-        apply_immediate_effect(game, p, cid, target_player, x_value)
+        apply_immediate_effect(game, p, ci, target_player, x_value)
 
-        p.discard.append(cid)
-        del p.hand[card_index]
+        p.discard.append(ci)
 
         await refresh_hand_message(query, context, game, p)
 
     elif kind == "assist_target":
         # assist_target|chat_id|giver_id|delegate_id|target_id|x_value|cid
         if len(data) != 7:
-            return
+            return False
         chat_id = int(data[1])
         giver_id = int(data[2])
         delegate_id = int(data[3])
         target_id = int(data[4])
         x_value = int(data[5])
-        cid = data[6]
+        ci = CARD_INDEX.get(data[6])
+        if ci is None:
+            return await alert(query, "Invalid card selection.")
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
 
         giver = game.players.get(giver_id)
         delegate = game.players.get(delegate_id)
         target = game.players.get(target_id)
 
         if not giver or not delegate or not target:
-            await query.edit_message_text("One of the players is no longer in the game.")
-            return
+            return await alert(query, "One of the players is no longer in the game.")
         if not giver.alive or not delegate.alive or not target.alive:
-            await query.edit_message_text("One of the players is no longer alive in the game.")
-            return
+            return await alert(query, "One of the players is no longer alive in the game.")
 
-        # Record the delegated vote as an ASSIST_ALLY action.
-        # /resolve already knows how to turn this into +1 or +2 vote(s) on target.
-        act = Action(
-            source_id=giver_id,
-            card_id=cid,
-            target_id=target_id,
-            x_value=x_value,
-        )
-        game.actions.append(act)
+        # Record the delegated vote as an ASSIST_ALLY action,
+        # which tallies +1 or +2 vote(s) on target.
+        record_action(game, giver_id, ci, target_id, x_value)
 
         await query.edit_message_text(
             f"✅ You directed {giver.username}'s vote to {target.username}."
@@ -2891,49 +3253,45 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     elif kind == "done":
         if len(data) != 3:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p:
-            await query.edit_message_text("Player not found.")
-            return
+            return await alert(query, "Player not found.")
         p.turn_done = True
+        p.last_hand_rendered = ""
         await query.edit_message_text(
             f"You are done playing this round.\n{format_hand(p)}"
         )
 
     elif kind == "info":
-        # info|chat_id|player_id|card_index
+        # info|chat_id|player_id|card_id
         if len(data) != 4:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
-        idx = int(data[3])
+        cid = data[3]
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p:
-            await query.edit_message_text("Player not found.")
-            return
-        if idx < 0 or idx >= len(p.hand):
-            await query.edit_message_text("Card not found.")
-            return
+            return await alert(query, "Player not found.")
+        ci = CARD_INDEX.get(cid)
+        if ci is None or ci not in p.hand:
+            return await alert(query, "Card not found.")
 
-        cid = p.hand[idx]
         name = card_name(cid)
         cost = card_cost(cid)
         cost_str = "X" if cost == "X" else ("-" if cost is None else str(cost))
         desc = card_desc(cid)
 
-        playable = is_card_playable(p, cid)
+        playable = is_card_playable(p.energy, ci)
 
         text = (
             f"📜 *{name}*\n"
@@ -2947,16 +3305,17 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             buttons.append([
                 InlineKeyboardButton(
                     text="▶ Play this card",
-                    callback_data=f"playcard|{game.chat_id}|{p.user_id}|{idx}",
+                    callback_data=encode_cb(game.game_id, game.round_number, CB_PLAY, ci),
                 )
             ])
         buttons.append([
             InlineKeyboardButton(
                 text="⬅️ Back to hand",
-                callback_data=f"backtohand|{game.chat_id}|{p.user_id}",
+                callback_data=encode_cb(game.game_id, game.round_number, CB_BACK),
             )
         ])
 
+        p.last_hand_rendered = ""
         await query.edit_message_text(
             text=text,
             reply_markup=InlineKeyboardMarkup(buttons),
@@ -2965,43 +3324,38 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     elif kind == "backtohand":
         if len(data) != 3:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p:
-            await query.edit_message_text("Player not found.")
-            return
+            return await alert(query, "Player not found.")
         await refresh_hand_message(query, context, game, p)
 
     # ----- Reward / draft selection -----
     elif kind == "reward_pick":
         if len(data) != 4:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
         cid = data[3]
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
 
         offers = game.reward_offers.get(player_id, [])
         if cid not in offers:
-            await query.edit_message_text("That reward is no longer available.")
-            return
+            return await alert(query, "That reward is no longer available.")
 
         p = game.players.get(player_id)
         if not p:
-            await query.edit_message_text("You are not in this game.")
-            return
+            return await alert(query, "You are not in this game.")
 
-        p.deck.append(cid)
+        p.deck.append(CARD_INDEX[cid])
         game.reward_offers[player_id] = []
         p.draft_done = True
 
@@ -3011,14 +3365,13 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     elif kind == "reward_skip":
         if len(data) != 3:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
 
         game.reward_offers[player_id] = []
         p = game.players.get(player_id)
@@ -3030,27 +3383,25 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif kind == "camp_upgrade":
         # camp_upgrade|chat_id|player_id
         if len(data) != 3:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p or not p.alive:
-            await query.edit_message_text("You are no longer in this game.")
-            return
+            return await alert(query, "You are no longer in this game.")
 
         # Only show cards that have an upgraded version
-        all_cards = list(set(p.deck + p.discard))
+        all_cards = list({CARD_IDS[ci] for ci in p.deck + p.discard})
         upgradable = [cid for cid in all_cards if cid in UPGRADE_MAP]
 
         if not upgradable:
             p.camp_done = True
             await query.edit_message_text("You have no cards that can be upgraded. Camp action complete.")
-            return
+            return False
 
         buttons = []
         for cid in sorted(upgradable):
@@ -3069,24 +3420,22 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif kind == "camp_remove":
         # camp_remove|chat_id|player_id
         if len(data) != 3:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p or not p.alive:
-            await query.edit_message_text("You are no longer in this game.")
-            return
+            return await alert(query, "You are no longer in this game.")
 
-        all_cards = list(set(p.deck + p.discard))
+        all_cards = list({CARD_IDS[ci] for ci in p.deck + p.discard})
         if not all_cards:
             p.camp_done = True
             await query.edit_message_text("You have no cards to remove. Camp action complete.")
-            return
+            return False
 
         buttons = []
         for cid in sorted(all_cards):
@@ -3105,39 +3454,36 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif kind == "camp_pick_upgrade":
         # camp_pick_upgrade|chat_id|player_id|card_id
         if len(data) != 4:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
         cid = data[3]
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p or not p.alive:
-            await query.edit_message_text("You are no longer in this game.")
-            return
+            return await alert(query, "You are no longer in this game.")
 
         new_id = UPGRADE_MAP.get(cid)
         if not new_id:
-            await query.answer("This card cannot be upgraded.", show_alert=True)
-            return
+            return await alert(query, "This card cannot be upgraded.")
 
+        ci = CARD_INDEX[cid]
         upgraded = False
         # Prefer upgrading from deck; if not found, upgrade from discard
-        if cid in p.deck:
-            idx = p.deck.index(cid)
-            p.deck[idx] = new_id
+        if ci in p.deck:
+            idx = p.deck.index(ci)
+            p.deck[idx] = CARD_INDEX[new_id]
             upgraded = True
-        elif cid in p.discard:
-            idx = p.discard.index(cid)
-            p.discard[idx] = new_id
+        elif ci in p.discard:
+            idx = p.discard.index(ci)
+            p.discard[idx] = CARD_INDEX[new_id]
             upgraded = True
 
         if not upgraded:
-            await query.answer("Card not found in your deck/discard.", show_alert=True)
-            return
+            return await alert(query, "Card not found in your deck/discard.")
 
         p.camp_done = True
         await query.edit_message_text(
@@ -3147,39 +3493,36 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif kind == "camp_pick_remove":
         # camp_pick_remove|chat_id|player_id|card_id
         if len(data) != 4:
-            return
+            return False
         chat_id = int(data[1])
         player_id = int(data[2])
         cid = data[3]
 
-        game = get_game(chat_id)
+        game = REGISTRY.get_game(chat_id)
         if not game:
-            await query.edit_message_text("Game no longer exists.")
-            return
+            return await alert(query, "Game no longer exists.")
         p = game.players.get(player_id)
         if not p or not p.alive:
-            await query.edit_message_text("You are no longer in this game.")
-            return
+            return await alert(query, "You are no longer in this game.")
 
         # remove first occurrence in deck, then discard if needed
+        ci = CARD_INDEX[cid]
         removed = False
-        if cid in p.deck:
-            p.deck.remove(cid)
+        if ci in p.deck:
+            p.deck.remove(ci)
             removed = True
-        elif cid in p.discard:
-            p.discard.remove(cid)
+        elif ci in p.discard:
+            p.discard.remove(ci)
             removed = True
 
         if not removed:
-            await query.answer("Card not found in your deck/discard.", show_alert=True)
-            return
+            return await alert(query, "Card not found in your deck/discard.")
 
         p.camp_done = True
         await query.edit_message_text(f"✅ Removed {card_name(cid)} from your deck.")
 
-    else:
-        # Unknown callback type
-        return
+    # Unknown callback types and completed taps leave the answer to handle_callback
+    return False
 
 
 # =========================
@@ -3187,11 +3530,32 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # =========================
 
 def main():
+    setup_logging()
+
     token = os.environ.get("BOT_TOKEN")
     if not token:
         raise RuntimeError("BOT_TOKEN env var not set")
 
-    application = ApplicationBuilder().token(token).build()
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    # Round broadcasts DM every player concurrently, so give the HTTP pool
+    # room for them instead of failing fast on pool exhaustion. HTTP/2 lets
+    # those requests share a few multiplexed connections.
+    request = HTTPXRequest(
+        connection_pool_size=256,
+        pool_timeout=30,
+        http_version="2",
+    )
+    # Concurrent fan-out can outrun Telegram's ~30 msg/s bot limit; the
+    # limiter paces sends (and per-group bursts) instead of eating 429s.
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .request(request)
+        .rate_limiter(AIORateLimiter(overall_max_rate=28))
+        .build()
+    )
 
     # Group commands
     application.add_handler(CommandHandler("help", help_cmd))
@@ -3229,8 +3593,8 @@ def main():
     )
     webhook_url = f"{base_url.rstrip('/')}/{webhook_path}"
 
-    logger.info(f"Starting webhook on 0.0.0.0:{port} at path /{webhook_path}")
-    logger.info(f"Webhook URL registered with Telegram: {webhook_url}")
+    logger.info("Starting webhook on 0.0.0.0:%s at path /%s", port, webhook_path)
+    logger.info("Webhook URL registered with Telegram: %s", webhook_url)
 
     application.run_webhook(
         listen="0.0.0.0",